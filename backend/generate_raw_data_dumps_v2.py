@@ -1,7 +1,5 @@
 import pandas as pd
 import numpy as np
-import random
-from datetime import datetime, timedelta
 
 # ==========================================
 # CONFIGURATION
@@ -18,15 +16,18 @@ OUTPUT_MJP_FINANCIAL = "raw_mjp_financial_report.csv"          # Financials
 OUTPUT_GSDA_WQMIS = "raw_gsda_water_quality.csv"               # District Level (UPDATED)
 OUTPUT_PGRS_GRIEVANCE = "raw_pgrs_grievance.csv"               # Grievances
 
-def random_date(start_year=2024, fmt="%Y-%m-%d"):
-    start = datetime(start_year, 1, 1)
-    end = datetime(start_year, 12, 31)
-    delta = end - start
-    random_days = random.randrange(delta.days)
-    return (start + timedelta(days=random_days)).strftime(fmt)
+def random_dates(rng, n, fmt="%Y-%m-%d", start_year=2024):
+    days = rng.integers(0, 365, size=n)
+    arr = np.datetime64(f"{start_year}-01-01") + days.astype("timedelta64[D]")
+    return pd.DatetimeIndex(arr).strftime(fmt).to_numpy()
 
-def generate_messy_data():
+def random_ids(rng, prefix, low, high, n):
+    # All IDs from one RNG call, prefixed in a single vectorized string op
+    return np.char.add(prefix, rng.integers(low, high, size=n, dtype=np.int64).astype(str))
+
+def generate_messy_data(seed=None):
     print("--- STARTING RAW DATA GENERATION (V2) ---")
+    rng = np.random.default_rng(seed) # One PCG64 stream for every draw below
     
     try:
         df_state = pd.read_csv(INPUT_FHTC_STATE)
@@ -46,7 +47,7 @@ def generate_messy_data():
     print("Generating IMIS Tap Water Status...")
     df_imis_state = df_state.copy()
     df_imis_state['State Name'] = df_imis_state['State Name'].str.strip()
-    df_imis_state['Report_Date'] = [random_date(fmt="%Y-%m-%d") for _ in range(len(df_imis_state))] # ISO Format
+    df_imis_state['Report_Date'] = random_dates(rng, len(df_imis_state), "%Y-%m-%d") # ISO Format
     df_imis_state.to_csv(OUTPUT_IMIS_TAP_STATUS, index=False)
     print(f"   -> Generated {OUTPUT_IMIS_TAP_STATUS}")
 
@@ -55,29 +56,28 @@ def generate_messy_data():
     # This file provides the "100%" status that conflicts with ZP's "0%"
     # ==============================================================================
     print("Generating IMIS Scheme Master...")
-    imis_schemes = []
+    n = len(common_districts)
+    districts = np.asarray(common_districts)
     
     # Generate matching records for ZP, plus the conflicting one
-    for dist in common_districts:
-        # Normal Record
-        imis_schemes.append({
-            "IMIS_ID": f"SCH-{random.randint(10000000, 99999999)}",
-            "District": dist,
-            "Scheme_Name": f"PWS {dist} Phase I",
-            "Status": "Ongoing",
-            "Completion_Date": ""
-        })
+    df_imis_scheme = pd.DataFrame({
+        "IMIS_ID": random_ids(rng, "SCH-", 10_000_000, 100_000_000, n),
+        "District": districts,
+        "Scheme_Name": np.char.add(np.char.add("PWS ", districts), " Phase I"),
+        "Status": np.full(n, "Ongoing"),
+        "Completion_Date": np.full(n, "")
+    })
     
     # --- INJECT COUNTERPART FOR CHALLENGE 2 ---
-    imis_schemes.append({
-        "IMIS_ID": "20118869", # Matches ZP ID
-        "District": "Thane",
-        "Scheme_Name": "Retrofitted PWS Thane",
-        "Status": "Completed", # Conflict! ZP says Pending
-        "Completion_Date": "2025-01-15"
+    conflict_row = pd.DataFrame({
+        "IMIS_ID": ["20118869"], # Matches ZP ID
+        "District": ["Thane"],
+        "Scheme_Name": ["Retrofitted PWS Thane"],
+        "Status": ["Completed"], # Conflict! ZP says Pending
+        "Completion_Date": ["2025-01-15"]
     })
 
-    df_imis_scheme = pd.DataFrame(imis_schemes)
+    df_imis_scheme = pd.concat([df_imis_scheme, conflict_row], ignore_index=True)
     df_imis_scheme.to_csv(OUTPUT_IMIS_SCHEME_MASTER, index=False)
     print(f"   -> Generated {OUTPUT_IMIS_SCHEME_MASTER} (Contains 'Completed' status for 20118869)")
 
@@ -88,36 +88,32 @@ def generate_messy_data():
     # Date Issue: Uses DD/MM/YYYY format (Different from IMIS)
     # ==============================================================================
     print("Generating ZP Scheme Progress...")
-    zp_data = []
+    phy = rng.integers(10, 101, n)
+    fin = rng.integers(10, 101, n)
     
-    for i, dist in enumerate(common_districts):
-        scheme_id = f"SCH-{random.randint(10000000, 99999999)}"
-        phy = random.randint(10, 100)
-        fin = random.randint(10, 100)
-        
-        # Challenge 1 Injection
-        if i % 10 == 0:
-            phy = 0
-            fin = 45 # Money spent, no work shown
-            
-        zp_data.append({
-            "Scheme_ID": scheme_id,
-            "District": dist,
-            "Physical_Progress": phy,
-            "Financial_Progress": fin,
-            "Last_Updated": random_date(fmt="%d/%m/%Y") # UK Format
-        })
+    # Challenge 1 Injection
+    ghost = np.arange(n) % 10 == 0
+    phy[ghost] = 0
+    fin[ghost] = 45 # Money spent, no work shown
+
+    df_zp = pd.DataFrame({
+        "Scheme_ID": random_ids(rng, "SCH-", 10_000_000, 100_000_000, n),
+        "District": districts,
+        "Physical_Progress": phy,
+        "Financial_Progress": fin,
+        "Last_Updated": random_dates(rng, n, "%d/%m/%Y") # UK Format
+    })
 
     # Challenge 2 Injection
-    zp_data.append({
-        "Scheme_ID": "20118869",
-        "District": "Thane",
-        "Physical_Progress": 0,
-        "Financial_Progress": 0,
-        "Last_Updated": "10/01/2025" # ZP hasn't updated recently
+    conflict_row = pd.DataFrame({
+        "Scheme_ID": ["20118869"],
+        "District": ["Thane"],
+        "Physical_Progress": [0],
+        "Financial_Progress": [0],
+        "Last_Updated": ["10/01/2025"] # ZP hasn't updated recently
     })
     
-    pd.DataFrame(zp_data).to_csv(OUTPUT_ZP_SCHEME_PROGRESS, index=False)
+    pd.concat([df_zp, conflict_row], ignore_index=True).to_csv(OUTPUT_ZP_SCHEME_PROGRESS, index=False)
     print(f"   -> Generated {OUTPUT_ZP_SCHEME_PROGRESS} (Contains Sync Conflict & UK Dates)")
 
     # ==============================================================================
@@ -126,27 +122,20 @@ def generate_messy_data():
     # Date Issue: Uses MM-DD-YYYY format (US Format)
     # ==============================================================================
     print("Generating MJP Financials...")
-    mjp_data = []
-    for i in range(30):
-        actuals = random.randint(100000, 5000000)
-        lakhs = round(actuals / 100000, 2)
-        
-        row = {
-            "Scheme_Code": f"MJP-{random.randint(5000, 9000)}",
-            "District": random.choice(common_districts),
-            "Expenditure_Actuals": actuals,
-            "Expenditure_Lakhs": lakhs,
-            "Transaction_Date": random_date(fmt="%m-%d-%Y") # US Format
-        }
-        
-        # Challenge 3 Injection (Swap columns)
-        if i == 5 or i == 15:
-            row["Expenditure_Actuals"] = lakhs
-            row["Expenditure_Lakhs"] = actuals
-            
-        mjp_data.append(row)
-        
-    pd.DataFrame(mjp_data).to_csv(OUTPUT_MJP_FINANCIAL, index=False)
+    n_mjp = 30
+    actuals = rng.integers(100000, 5000001, n_mjp).astype(float)
+    lakhs = np.round(actuals / 100000, 2)
+    
+    # Challenge 3 Injection (Swap columns)
+    swapped = np.isin(np.arange(n_mjp), [5, 15])
+    
+    pd.DataFrame({
+        "Scheme_Code": random_ids(rng, "MJP-", 5000, 9001, n_mjp),
+        "District": rng.choice(districts, n_mjp),
+        "Expenditure_Actuals": np.where(swapped, lakhs, actuals),
+        "Expenditure_Lakhs": np.where(swapped, actuals, lakhs),
+        "Transaction_Date": random_dates(rng, n_mjp, "%m-%d-%Y") # US Format
+    }).to_csv(OUTPUT_MJP_FINANCIAL, index=False)
     print(f"   -> Generated {OUTPUT_MJP_FINANCIAL} (Contains Column Shift & US Dates)")
 
     # ==============================================================================
@@ -155,26 +144,18 @@ def generate_messy_data():
     # Granularity: Now matches District level for joining
     # ==============================================================================
     print("Generating GSDA Water Quality...")
-    gsda_data = []
-    
-    for dist in common_districts:
-        # Simulate state lookup (simplified)
-        state_name = "Maharashtra" 
-        
-        # Inject Challenge 4 Naming randomly into the 'State' column if we were processing multiple states
-        # For simulation, we force one record to be the outlier
-        if dist == common_districts[0]: 
-            state_name = "Andaman & Nicobar Islands" # Conflict with IMIS "A & N"
-
-        gsda_data.append({
-            "State_Name": state_name,
-            "District_Name": dist,
-            "Samples_Tested": random.randint(500, 2000),
-            "Contaminated_Samples": random.randint(0, 50),
-            "Lab_Report_Date": random_date(fmt="%Y-%m-%d")
-        })
-
-    pd.DataFrame(gsda_data).to_csv(OUTPUT_GSDA_WQMIS, index=False)
+    # Simulate state lookup (simplified)
+    # Inject Challenge 4 Naming randomly into the 'State' column if we were processing multiple states
+    # For simulation, we force one record to be the outlier
+    state_name = np.where(districts == common_districts[0], "Andaman & Nicobar Islands", "Maharashtra") # Conflict with IMIS "A & N"
+
+    pd.DataFrame({
+        "State_Name": state_name,
+        "District_Name": districts,
+        "Samples_Tested": rng.integers(500, 2001, n),
+        "Contaminated_Samples": rng.integers(0, 51, n),
+        "Lab_Report_Date": random_dates(rng, n, "%Y-%m-%d")
+    }).to_csv(OUTPUT_GSDA_WQMIS, index=False)
     print(f"   -> Generated {OUTPUT_GSDA_WQMIS} (District Level with Naming Conflict)")
 
     # ==============================================================================
@@ -182,27 +163,22 @@ def generate_messy_data():
     # New Issue: Logical Error (Resolved Date < Reported Date)
     # ==============================================================================
     print("Generating PGRS Grievances...")
-    pgrs_data = []
-    for dist in common_districts[:20]:
-        report_date_str = random_date(fmt="%Y-%m-%d")
-        report_date = datetime.strptime(report_date_str, "%Y-%m-%d")
-        
-        # Normal Case
-        resolve_date = report_date + timedelta(days=5)
-        
-        # Logical Error Injection
-        if random.random() < 0.1: # 10% chance
-            resolve_date = report_date - timedelta(days=2) # Resolved before reported!
-            
-        pgrs_data.append({
-            "Ticket_ID": f"TKT-{random.randint(1000,9999)}",
-            "District": dist,
-            "Issue": "No Water",
-            "Date_Reported": report_date.strftime("%Y-%m-%d"),
-            "Date_Resolved": resolve_date.strftime("%Y-%m-%d")
-        })
+    pgrs_districts = districts[:20]
+    n_pgrs = len(pgrs_districts)
+    report_date = pd.to_datetime(random_dates(rng, n_pgrs, "%Y-%m-%d"))
+    
+    # Normal Case: resolved 5 days later
+    # Logical Error Injection: 10% chance of being resolved 2 days before reported!
+    resolve_offset = np.where(rng.random(n_pgrs) < 0.1, -2, 5)
+    resolve_date = report_date + pd.to_timedelta(resolve_offset, unit="D")
         
-    pd.DataFrame(pgrs_data).to_csv(OUTPUT_PGRS_GRIEVANCE, index=False)
+    pd.DataFrame({
+        "Ticket_ID": random_ids(rng, "TKT-", 1000, 10000, n_pgrs),
+        "District": pgrs_districts,
+        "Issue": np.full(n_pgrs, "No Water"),
+        "Date_Reported": report_date.strftime("%Y-%m-%d"),
+        "Date_Resolved": resolve_date.strftime("%Y-%m-%d")
+    }).to_csv(OUTPUT_PGRS_GRIEVANCE, index=False)
     print(f"   -> Generated {OUTPUT_PGRS_GRIEVANCE} (Contains Logical Date Errors)")
 
     print("\n✅ SUCCESS: All 6 Raw Data Files Generated.")
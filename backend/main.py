@@ -1,16 +1,29 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Body
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from typing import List, Dict, Any
+from typing import List
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import io
-import requests
 import os
+import asyncio
+import functools
+import multiprocessing
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
 from sqlalchemy import create_engine, text, MetaData, Table
-from sqlalchemy.dialects.postgresql import insert
 
-app = FastAPI(title="JJM Cloud Backend")
+@asynccontextmanager
+async def lifespan(app):
+    ensure_tables()
+    # Spawned workers don't inherit this process's threads (asyncio/Arrow pools) or its open DB connections
+    app.state.pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+    yield
+    app.state.pool.shutdown()
+
+app = FastAPI(title="JJM Cloud Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -37,6 +50,19 @@ STATE_MAPPING = {
     "Andaman & Nicobar Islands": "Andaman & Nicobar Islands",
     "Maharashtra": "Maharashtra"
 }
+CANONICAL_STATES = sorted(set(STATE_MAPPING.values()))
+
+# Placeholders for gaps left by the outer join of scheme sources
+UNIFIED_FILL_VALUES = {
+    "Physical_Progress": 0,
+    "Financial_Progress": 0,
+    "Cleaned_Expenditure_INR": 0,
+    "Scheme_Name": "-",
+    "Status": "-",
+    "Completion_Date": "-",
+    "Last_Updated": "-",
+    "District": "-"
+}
 
 # FILE MAPPING (Local filenames)
 # We map keys directly to filenames now, to avoid network calls
@@ -49,25 +75,111 @@ RAW_FILES = {
     "pgrs": "raw_pgrs_grievance.csv"
 }
 
+# REPO TABLE SCHEMAS (created at startup by ensure_tables)
+SCHEME_COLUMNS = {
+    "Scheme_ID": "TEXT PRIMARY KEY",
+    "District": "TEXT",
+    "Scheme_Name": "TEXT",
+    "Status": "TEXT",
+    "Completion_Date": "TEXT",
+    "Physical_Progress": "DOUBLE PRECISION",
+    "Financial_Progress": "DOUBLE PRECISION",
+    "Last_Updated": "TEXT",
+    "Cleaned_Expenditure_INR": "DOUBLE PRECISION",
+    "Unified_Status": "TEXT"
+}
+DISTRICT_METRIC_COLUMNS = {
+    "Samples_Tested": "DOUBLE PRECISION",
+    "Contaminated_Samples": "DOUBLE PRECISION",
+    "Total_Grievances": "DOUBLE PRECISION",
+    "Contamination_Rate": "DOUBLE PRECISION"
+}
+TABLE_SCHEMAS = {
+    "table_schemes": SCHEME_COLUMNS,
+    "table_districts": {"District_Name": "TEXT PRIMARY KEY", **DISTRICT_METRIC_COLUMNS},
+    "table_master": {**SCHEME_COLUMNS, **DISTRICT_METRIC_COLUMNS}
+}
+
+# RAW DATE COLUMNS (kept as text; each source uses its own date format)
+RAW_DATE_COLUMNS = {
+    "imis_tap": ["Report_Date"],
+    "imis_schemes": ["Completion_Date"],
+    "zp": ["Last_Updated"],
+    "mjp": ["Transaction_Date"],
+    "gsda": ["Lab_Report_Date"],
+    "pgrs": ["Date_Reported", "Date_Resolved"]
+}
+CSV_READ_OPTIONS = pa_csv.ReadOptions(use_threads=True, block_size=1 << 20)
+RAW_CONVERT_OPTIONS = {
+    key: pa_csv.ConvertOptions(column_types={c: pa.string() for c in cols}, strings_can_be_null=True)
+    for key, cols in RAW_DATE_COLUMNS.items()
+}
+
 # --- UTILS ---
-def clean_financials(row):
-    try:
-        act = float(row['Expenditure_Actuals']) if pd.notnull(row['Expenditure_Actuals']) else 0.0
-        lakhs = float(row['Expenditure_Lakhs']) if pd.notnull(row['Expenditure_Lakhs']) else 0.0
-    except: return 0.0, 0.0
-    if lakhs > 1000 and act < 1000: return lakhs, act 
-    return act, lakhs
+def read_csv_arrow(source, key=None):
+    # Arrow's threaded CSV reader with the source's prebuilt column types, so known date columns are parsed straight
+    # to text; any other inferred date column is cast back to text so it matches the pandas parser
+    convert_options = RAW_CONVERT_OPTIONS.get(key) or pa_csv.ConvertOptions(strings_can_be_null=True)
+    table = pa_csv.read_csv(source, read_options=CSV_READ_OPTIONS, convert_options=convert_options)
+    if any(pa.types.is_temporal(f.type) for f in table.schema):
+        table = table.cast(pa.schema([pa.field(f.name, pa.string()) if pa.types.is_temporal(f.type) else f for f in table.schema]))
+    return table.to_pandas()
+
+def records_json(df):
+    # pandas' C JSON writer; NaN -> null. Floats are rounded to 15 decimal places, not full repr precision
+    return df.to_json(orient='records', double_precision=15)
 
 # --- DATABASE HELPERS ---
-def ensure_primary_key(table_name, pk_column):
+tables_ready = False
+
+def ensure_tables():
+    global tables_ready
+    if tables_ready: return
     try:
         with engine.connect() as conn:
-            check_sql = text(f"SELECT constraint_name FROM information_schema.table_constraints WHERE table_name = '{table_name}' AND constraint_type = 'PRIMARY KEY'")
-            if not conn.execute(check_sql).fetchone():
-                conn.execute(text(f'ALTER TABLE "{table_name}" ADD PRIMARY KEY ("{pk_column}")'))
-                conn.commit()
+            for table_name, columns in TABLE_SCHEMAS.items():
+                column_sql = ", ".join(f'"{name}" {sql_type}' for name, sql_type in columns.items())
+                conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{table_name}" ({column_sql})'))
+            conn.commit()
+        tables_ready = True
+    except Exception as e: print(f"Schema Warning: {e}")
+
+@functools.lru_cache(maxsize=32)
+def _ensure_pk_once(table_name, pk_column):
+    # Cached per process; a failed check raises and is therefore retried on the next upsert
+    with engine.connect() as conn:
+        check_sql = text(f"SELECT constraint_name FROM information_schema.table_constraints WHERE table_name = '{table_name}' AND constraint_type = 'PRIMARY KEY'")
+        if not conn.execute(check_sql).fetchone():
+            conn.execute(text(f'ALTER TABLE "{table_name}" ADD PRIMARY KEY ("{pk_column}")'))
+            conn.commit()
+
+def ensure_primary_key(table_name, pk_column):
+    try: _ensure_pk_once(table_name, pk_column)
     except Exception as e: print(f"PK Warning: {e}")
 
+def csv_field(v):
+    # Missing values become an unquoted empty field, which is COPY's NULL in CSV mode; everything else is quoted,
+    # so empty strings and other text can never be read back as NULL
+    if pd.isna(v): return ""
+    return '"' + str(v).replace('"', '""') + '"'
+
+class CsvTextIO(io.TextIOBase):
+    # Read-only text stream that renders DataFrame rows as CSV on demand, so COPY never needs the whole payload as one string
+    def __init__(self, rows):
+        self._lines = (",".join(map(csv_field, row)) + "\n" for row in rows)
+        self._buf = ""
+
+    def readable(self): return True
+
+    def read(self, size=-1):
+        while size is None or size < 0 or len(self._buf) < size:
+            line = next(self._lines, None)
+            if line is None: break
+            self._buf += line
+        if size is None or size < 0: size = len(self._buf)
+        chunk, self._buf = self._buf[:size], self._buf[size:]
+        return chunk
+
 def perform_upsert(df, table_name, primary_key):
     if df.empty: return
     ensure_primary_key(table_name, primary_key)
@@ -76,16 +188,22 @@ def perform_upsert(df, table_name, primary_key):
         target_table = Table(table_name, metadata, autoload_with=engine)
     except: return
 
-    with engine.connect() as conn:
-        data = df.to_dict(orient='records')
-        stmt = insert(target_table).values(data)
-        update_cols = {col.name: stmt.excluded[col.name] for col in target_table.c if col.name != primary_key}
-        if update_cols:
-            on_conflict_stmt = stmt.on_conflict_do_update(index_elements=[primary_key], set_=update_cols)
-            conn.execute(on_conflict_stmt)
-        else:
-            conn.execute(stmt.on_conflict_do_nothing(index_elements=[primary_key]))
+    # Stream the rows into a temp table with COPY, then merge into the target with a single INSERT ... SELECT
+    cols = [c for c in df.columns if c in target_table.c]
+    tmp_table = f"tmp_{table_name}"
+    copy_cols = ", ".join(f'"{c}"' for c in cols)
+    update_cols = ", ".join(f'"{col.name}" = EXCLUDED."{col.name}"' for col in target_table.c if col.name != primary_key)
+    on_conflict = f"DO UPDATE SET {update_cols}" if update_cols else "DO NOTHING"
+
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f'CREATE TEMP TABLE "{tmp_table}" (LIKE "{table_name}" INCLUDING DEFAULTS) ON COMMIT DROP')
+            cur.copy_expert(f"COPY \"{tmp_table}\" ({copy_cols}) FROM STDIN WITH (FORMAT csv)", CsvTextIO(df[cols].itertuples(index=False, name=None)))
+            cur.execute(f'INSERT INTO "{table_name}" SELECT * FROM "{tmp_table}" ON CONFLICT ("{primary_key}") {on_conflict}')
         conn.commit()
+    finally:
+        conn.close()
 
 # --- CORE PIPELINE ---
 def run_etl_pipeline(dfs):
@@ -95,136 +213,143 @@ def run_etl_pipeline(dfs):
     if 'gsda' in dfs:
         df_gsda = dfs['gsda']
         if 'State_Name' in df_gsda.columns:
-            non_std = df_gsda[~df_gsda['State_Name'].isin(STATE_MAPPING.values())]
-            for _, row in non_std.iterrows():
-                anomalies.append({"Scheme_ID": "N/A", "Issue_Type": "Naming Convention", "Severity": "Medium", "Description": f"Non-standard State: '{row['State_Name']}'"})
+            # Names outside the canonical categories get code -1
+            non_std = pd.Categorical(df_gsda['State_Name'], categories=CANONICAL_STATES).codes == -1
+            for sname in df_gsda.loc[non_std, 'State_Name'].to_numpy():
+                anomalies.append({"Scheme_ID": "N/A", "Issue_Type": "Naming Convention", "Severity": "Medium", "Description": f"Non-standard State: '{sname}'"})
 
-    df_imis = dfs['imis_schemes'].copy()
-    df_imis.rename(columns={'IMIS_ID': 'Scheme_ID'}, inplace=True) 
+    df_imis = dfs['imis_schemes'].rename(columns={'IMIS_ID': 'Scheme_ID'})
     
     if 'zp' in dfs:
-        df_zp = dfs['zp'].copy()
-        merged_check = pd.merge(df_imis, df_zp, on="Scheme_ID", how="outer", suffixes=('_IMIS', '_ZP'))
-        for _, row in merged_check.iterrows():
-            status = str(row['Status']).lower() if pd.notnull(row['Status']) else ""
-            phy_prog = row['Physical_Progress'] if pd.notnull(row['Physical_Progress']) else 0
-            fin_prog = row.get('Financial_Progress', 0)
-            
-            if status == 'completed' and phy_prog == 0:
-                anomalies.append({"Scheme_ID": row['Scheme_ID'], "Issue_Type": "Sync Conflict", "Severity": "Critical", "Description": "IMIS Complete vs ZP Pending"})
-            if phy_prog == 0 and fin_prog > 0:
-                anomalies.append({"Scheme_ID": row['Scheme_ID'], "Issue_Type": "Ghost Asset", "Severity": "High", "Description": f"Fin Progress {fin_prog}% without Physical Progress"})
+        merged_check = pd.merge(df_imis, dfs['zp'], on="Scheme_ID", how="outer", suffixes=('_IMIS', '_ZP'))
+        status_lc = merged_check['Status'].astype(str).str.lower()
+        phy = merged_check['Physical_Progress'].fillna(0)
+        fin = merged_check['Financial_Progress'].fillna(0)
+
+        m_sync = (status_lc == 'completed') & (phy == 0)
+        anomalies.extend({"Scheme_ID": sid, "Issue_Type": "Sync Conflict", "Severity": "Critical", "Description": "IMIS Complete vs ZP Pending"} for sid in merged_check.loc[m_sync, 'Scheme_ID'])
+        m_ghost = (phy == 0) & (fin > 0)
+        anomalies.extend({"Scheme_ID": sid, "Issue_Type": "Ghost Asset", "Severity": "High", "Description": f"Fin Progress {fin_prog}% without Physical Progress"} for sid, fin_prog in zip(merged_check.loc[m_ghost, 'Scheme_ID'], merged_check.loc[m_ghost, 'Financial_Progress']))
 
     if 'mjp' in dfs:
-        df_mjp = dfs['mjp'].copy()
-        cleaned_fins = df_mjp.apply(clean_financials, axis=1, result_type='expand')
-        df_mjp['Cleaned_Expenditure_INR'] = cleaned_fins[0]
-        for i, row in df_mjp.iterrows():
-            if abs(float(row['Expenditure_Actuals']) - row['Cleaned_Expenditure_INR']) > 1.0: 
-                anomalies.append({"Scheme_ID": row['Scheme_Code'], "Issue_Type": "Column Mismatch", "Severity": "Medium", "Description": "Financial Columns Swapped. Auto-corrected."})
-        df_mjp.rename(columns={'Scheme_Code': 'Scheme_ID'}, inplace=True)
+        df_mjp = dfs['mjp'].rename(columns={'Scheme_Code': 'Scheme_ID'})
+        act = pd.to_numeric(df_mjp['Expenditure_Actuals'], errors='coerce').fillna(0.0).to_numpy()
+        lakhs = pd.to_numeric(df_mjp['Expenditure_Lakhs'], errors='coerce').fillna(0.0).to_numpy()
+        # Rupee amount landed in the Lakhs column and vice versa
+        swap = (lakhs > 1000) & (act < 1000)
+        df_mjp['Cleaned_Expenditure_INR'] = np.where(swap, lakhs, act)
+        m_swapped = np.abs(act - df_mjp['Cleaned_Expenditure_INR'].to_numpy()) > 1.0
+        anomalies.extend({"Scheme_ID": sid, "Issue_Type": "Column Mismatch", "Severity": "Medium", "Description": "Financial Columns Swapped. Auto-corrected."} for sid in df_mjp.loc[m_swapped, 'Scheme_ID'])
     else:
         df_mjp = pd.DataFrame(columns=['Scheme_ID', 'District', 'Cleaned_Expenditure_INR'])
 
     if 'pgrs' in dfs:
-        for _, row in dfs['pgrs'].iterrows():
-            try:
-                if pd.to_datetime(row['Date_Resolved']) < pd.to_datetime(row['Date_Reported']):
-                    anomalies.append({"Scheme_ID": row['Ticket_ID'], "Issue_Type": "Logical Data Error", "Severity": "Low", "Description": "Ticket Resolved before Reported."})
-            except: pass
+        df_pgrs = dfs['pgrs']
+        reported = pd.to_datetime(df_pgrs['Date_Reported'], format='%Y-%m-%d', cache=True, errors='coerce')
+        resolved = pd.to_datetime(df_pgrs['Date_Resolved'], format='%Y-%m-%d', cache=True, errors='coerce')
+        m_logical = resolved < reported
+        anomalies.extend({"Scheme_ID": tid, "Issue_Type": "Logical Data Error", "Severity": "Low", "Description": "Ticket Resolved before Reported."} for tid in df_pgrs.loc[m_logical, 'Ticket_ID'])
 
     # 2. REPO GENERATION
-    src_imis = df_imis[['Scheme_ID', 'District', 'Scheme_Name', 'Status', 'Completion_Date']].copy()
+    src_imis = df_imis[['Scheme_ID', 'District', 'Scheme_Name', 'Status', 'Completion_Date']].set_index('Scheme_ID')
     src_zp = pd.DataFrame()
-    if 'zp' in dfs: src_zp = dfs['zp'][['Scheme_ID', 'District', 'Physical_Progress', 'Financial_Progress', 'Last_Updated']].copy()
+    if 'zp' in dfs: src_zp = dfs['zp'][['Scheme_ID', 'District', 'Physical_Progress', 'Financial_Progress', 'Last_Updated']].rename(columns={'District': 'District_ZP'}).set_index('Scheme_ID')
     src_mjp = pd.DataFrame()
-    if 'mjp' in dfs: src_mjp = df_mjp.groupby(['Scheme_ID', 'District'])['Cleaned_Expenditure_INR'].sum().reset_index()
-
-    unified = src_imis.copy()
-    if not src_zp.empty:
-        unified = pd.merge(unified, src_zp, on='Scheme_ID', how='outer', suffixes=('', '_ZP'))
-        unified['District'] = unified['District'].fillna(unified['District_ZP'])
-        unified.drop(columns=['District_ZP'], inplace=True)
-    if not src_mjp.empty:
-        unified = pd.merge(unified, src_mjp, on='Scheme_ID', how='outer', suffixes=('', '_MJP'))
-        if 'District_MJP' in unified.columns:
-            unified['District'] = unified['District'].fillna(unified['District_MJP'])
-            unified.drop(columns=['District_MJP'], inplace=True)
-
-    for c in ['Physical_Progress', 'Financial_Progress', 'Cleaned_Expenditure_INR']:
-        if c in unified.columns: unified[c] = unified[c].fillna(0)
-    for c in ['Scheme_Name', 'Status', 'Completion_Date', 'Last_Updated', 'District']:
-        if c in unified.columns: unified[c] = unified[c].fillna("-")
-
-    def determine_status(row):
-        status = str(row.get('Status', '-')).lower()
-        phy = row.get('Physical_Progress', 0)
-        fin_mjp = row.get('Cleaned_Expenditure_INR', 0)
-        if status == 'completed' and phy == 0: return "DATA CONFLICT"
-        if status == '-' or status == 'nan':
-            if phy > 90: return "Completed (ZP)"
-            if phy > 0: return "Ongoing (ZP)"
-            if fin_mjp > 0: return "Financial Only"
-            return "Unknown"
-        return row.get('Status', '-')
-
-    unified['Unified_Status'] = unified.apply(determine_status, axis=1)
-    unified['Scheme_Name'] = unified.apply(lambda r: f"Scheme {r['Scheme_ID']}" if r['Scheme_Name'] in ['-', 'nan', ''] else r['Scheme_Name'], axis=1)
+    if 'mjp' in dfs: src_mjp = df_mjp.groupby(['Scheme_ID', 'District'])['Cleaned_Expenditure_INR'].sum().reset_index(level='District').rename(columns={'District': 'District_MJP'})
+
+    # Multi-way outer join on the Scheme_ID index
+    others = [src for src in (src_zp, src_mjp) if not src.empty]
+    unified = src_imis.join(others, how='outer') if others else src_imis
+    for c in ['District_ZP', 'District_MJP']:
+        if c in unified.columns: unified['District'] = unified['District'].fillna(unified.pop(c))
+    unified = unified.reset_index()
+
+    unified.fillna({k: v for k, v in UNIFIED_FILL_VALUES.items() if k in unified.columns}, inplace=True)
+
+    status_lc = unified['Status'].astype(str).str.lower()
+    phy = unified.get('Physical_Progress', pd.Series(0, index=unified.index)).to_numpy()
+    fin_mjp = unified.get('Cleaned_Expenditure_INR', pd.Series(0, index=unified.index)).to_numpy()
+    missing = status_lc.isin(['-', 'nan']).to_numpy()
+    conds = [(status_lc == 'completed').to_numpy() & (phy == 0), missing & (phy > 90), missing & (phy > 0), missing & (fin_mjp > 0), missing]
+    choices = ["DATA CONFLICT", "Completed (ZP)", "Ongoing (ZP)", "Financial Only", "Unknown"]
+    unified['Unified_Status'] = np.select(conds, choices, default=unified['Status'].to_numpy(dtype=object))
+
+    m_no_name = unified['Scheme_Name'].isin(['-', 'nan', ''])
+    unified.loc[m_no_name, 'Scheme_Name'] = "Scheme " + unified.loc[m_no_name, 'Scheme_ID'].astype(str)
     unified_schemes = unified
 
     unique_districts = pd.DataFrame(unified_schemes['District'].unique(), columns=['District_Name'])
     unique_districts = unique_districts[unique_districts['District_Name'] != '-']
     
     if 'gsda' in dfs:
-        df_gsda = dfs['gsda'].copy()
-        gsda_grouped = df_gsda.groupby('District_Name')[['Samples_Tested', 'Contaminated_Samples']].sum().reset_index()
+        gsda_grouped = dfs['gsda'].groupby('District_Name')[['Samples_Tested', 'Contaminated_Samples']].sum().reset_index()
         unified_districts = pd.merge(unique_districts, gsda_grouped, on='District_Name', how='left')
     else:
         unified_districts['Samples_Tested'] = 0
         unified_districts['Contaminated_Samples'] = 0
 
     if 'pgrs' in dfs:
-        df_pgrs = dfs['pgrs'].copy()
-        df_pgrs.rename(columns={'District': 'District_Name'}, inplace=True)
-        pgrs_grouped = df_pgrs.groupby('District_Name').size().reset_index(name='Total_Grievances')
+        pgrs_grouped = dfs['pgrs'].groupby('District').size().reset_index(name='Total_Grievances').rename(columns={'District': 'District_Name'})
         unified_districts = pd.merge(unified_districts, pgrs_grouped, on='District_Name', how='left')
     else:
         unified_districts['Total_Grievances'] = 0
 
-    unified_districts = unified_districts.fillna(0)
+    num_cols = unified_districts.select_dtypes(include='number').columns
+    unified_districts[num_cols] = unified_districts[num_cols].fillna(0)
     def calc_rate(row): return round((row['Contaminated_Samples'] / row['Samples_Tested']) * 100, 2) if row['Samples_Tested'] > 0 else 0.0
     unified_districts['Contamination_Rate'] = unified_districts.apply(calc_rate, axis=1)
 
     repo_2_join = unified_districts.rename(columns={'District_Name': 'District'})
     unified_master = pd.merge(unified_schemes, repo_2_join, on='District', how='left')
-    unified_master = unified_master.replace({np.nan: 0, '': '-'})
-
-    return {
-        "status": "success", 
-        "anomalies": anomalies, 
-        "repo_schemes": unified_schemes.replace({np.nan: None}).to_dict(orient='records'),
-        "repo_districts": unified_districts.replace({np.nan: None}).to_dict(orient='records'),
-        "repo_master": unified_master.replace({np.nan: None}).to_dict(orient='records')
-    }
+    # Numeric gaps -> 0, text gaps and empty strings -> '-'
+    num_cols = unified_master.select_dtypes(include='number').columns
+    unified_master[num_cols] = unified_master[num_cols].fillna(0)
+    text_cols = unified_master.columns.difference(num_cols)
+    unified_master[text_cols] = unified_master[text_cols].fillna('-').replace('', '-')
+
+    return (
+        '{"status": "success", "anomalies": ' + records_json(pd.DataFrame(anomalies, columns=["Scheme_ID", "Issue_Type", "Severity", "Description"]))
+        + ', "repo_schemes": ' + records_json(unified_schemes)
+        + ', "repo_districts": ' + records_json(unified_districts)
+        + ', "repo_master": ' + records_json(unified_master) + '}'
+    )
 
 # --- ROUTES ---
 
-@app.post("/standardize")
-async def standardize_data(files: List[UploadFile] = File(...)):
+async def run_etl_in_pool(dfs):
+    # Pandas work runs in the process pool so it neither blocks the event loop nor contends for this process's GIL;
+    # without a pool (lifespan not run, e.g. a bare TestClient) it falls back to the default thread executor
+    # imis_tap is not read by the pipeline, so it is not pickled across to the worker
+    pool = getattr(app.state, "pool", None)
+    used = {k: v for k, v in dfs.items() if k != 'imis_tap'}
+    return await asyncio.get_running_loop().run_in_executor(pool, run_etl_pipeline, used)
+
+def read_uploads(files):
     dfs = {}
     for file in files:
-        content = await file.read()
         filename = file.filename.lower()
         try:
-            if "imis" in filename and "tap" in filename: dfs['imis_tap'] = pd.read_csv(io.BytesIO(content))
-            elif "imis" in filename and "scheme" in filename: dfs['imis_schemes'] = pd.read_csv(io.BytesIO(content))
-            elif "zp" in filename: dfs['zp'] = pd.read_csv(io.BytesIO(content))
-            elif "mjp" in filename: dfs['mjp'] = pd.read_csv(io.BytesIO(content))
-            elif "gsda" in filename: dfs['gsda'] = pd.read_csv(io.BytesIO(content))
-            elif "pgrs" in filename: dfs['pgrs'] = pd.read_csv(io.BytesIO(content))
+            if "imis" in filename and "tap" in filename: dfs['imis_tap'] = read_csv_arrow(file.file, 'imis_tap')
+            elif "imis" in filename and "scheme" in filename: dfs['imis_schemes'] = read_csv_arrow(file.file, 'imis_schemes')
+            elif "zp" in filename: dfs['zp'] = read_csv_arrow(file.file, 'zp')
+            elif "mjp" in filename: dfs['mjp'] = read_csv_arrow(file.file, 'mjp')
+            elif "gsda" in filename: dfs['gsda'] = read_csv_arrow(file.file, 'gsda')
+            elif "pgrs" in filename: dfs['pgrs'] = read_csv_arrow(file.file, 'pgrs')
         except Exception as e: print(f"Error reading {filename}: {e}")
+    return dfs
+
+@app.post("/standardize")
+async def standardize_data(files: List[UploadFile] = File(...)):
+    dfs = await asyncio.to_thread(read_uploads, files)
     if 'imis_schemes' not in dfs: raise HTTPException(status_code=400, detail="Missing Critical File: IMIS Scheme Master")
-    return run_etl_pipeline(dfs)
+    return Response(content=await run_etl_in_pool(dfs), media_type="application/json")
+
+def read_raw_file(key, filename):
+    file_path = os.path.join("static", filename)
+    if not os.path.exists(file_path):
+        print(f"Warning: File {filename} not found locally.")
+        return None
+    return read_csv_arrow(file_path, key)
 
 @app.post("/fetch-from-api")
 async def fetch_data_from_api():
@@ -232,39 +357,42 @@ async def fetch_data_from_api():
     dfs = {}
     
     # NEW LOGIC: READ FILES FROM DISK (NO NETWORK CALLS)
-    for key, filename in RAW_FILES.items():
-        file_path = os.path.join("static", filename)
-        try:
-            if os.path.exists(file_path):
-                dfs[key] = pd.read_csv(file_path)
-            else:
-                print(f"Warning: File {filename} not found locally.")
-        except Exception as e: 
-            print(f"Failed to read {key}: {e}")
+    # All six dumps are read concurrently on worker threads, so wall time is the slowest file, not the sum
+    results = await asyncio.gather(*[asyncio.to_thread(read_raw_file, key, filename) for key, filename in RAW_FILES.items()], return_exceptions=True)
+    for key, result in zip(RAW_FILES.keys(), results):
+        if isinstance(result, Exception): print(f"Failed to read {key}: {result}")
+        elif result is not None: dfs[key] = result
 
     if 'imis_schemes' not in dfs: raise HTTPException(status_code=502, detail="Critical Data Missing on Server")
-    return run_etl_pipeline(dfs)
+    return Response(content=await run_etl_in_pool(dfs), media_type="application/json")
+
+async def read_repo_payload(request):
+    # The dashboard posts JSON records; other clients can send multipart with one Arrow IPC stream per repo key,
+    # which skips JSON tokenization on both ends and keeps column dtypes
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        async with request.form() as form:
+            return {key: pa.ipc.open_stream(part.file).read_pandas() for key, part in form.items() if not isinstance(part, str)}
+    return {key: pd.DataFrame(rows) for key, rows in (await request.json()).items() if isinstance(rows, list)}
 
 @app.post("/save-to-db")
-async def save_to_db(payload: Dict[str, Any] = Body(...)):
+async def save_to_db(request: Request):
     try:
+        payload = await read_repo_payload(request)
+        ensure_tables()
         if 'repo_schemes' in payload:
-            df = pd.DataFrame(payload['repo_schemes'])
-            df.head(0).to_sql('table_schemes', engine, if_exists='append', index=False)
+            df = payload['repo_schemes']
             perform_upsert(df, 'table_schemes', 'Scheme_ID')
 
         if 'repo_districts' in payload:
-            df = pd.DataFrame(payload['repo_districts'])
-            df.head(0).to_sql('table_districts', engine, if_exists='append', index=False)
+            df = payload['repo_districts']
             perform_upsert(df, 'table_districts', 'District_Name')
 
         if 'repo_master' in payload:
-            df = pd.DataFrame(payload['repo_master'])
-            df.head(0).to_sql('table_master', engine, if_exists='append', index=False)
+            df = payload['repo_master']
             perform_upsert(df, 'table_master', 'Scheme_ID')
             
         if 'anomalies' in payload:
-            df = pd.DataFrame(payload['anomalies'])
+            df = payload['anomalies']
             df.to_sql('table_anomalies', engine, if_exists='replace', index=False)
 
         return {"status": "success", "message": "Data Upserted to PostgreSQL successfully."}